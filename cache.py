@@ -0,0 +1,113 @@
+# cache.py
+"""
+Small helpers that sit in front of the graph pipeline.
+
+SingleFlight lets concurrent callers asking the same (normalised) question
+share a single in-flight graph run instead of each hitting the retriever
+and the LLM separately. AnswerCache keeps finished answers around so the
+prewarm scheduler can fill them in before a meal slot opens.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+def normalise_question(question: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so near-identical questions share a key."""
+    q = (question or "").lower()
+    q = re.sub(r"[^a-z0-9\s]", " ", q)
+    return " ".join(q.split())
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key.
+
+    The first caller for a key runs fn(); everyone else who arrives while it
+    is still running waits and gets the same result (or the same exception).
+    Nothing is kept once the call finishes, so later callers always trigger
+    a fresh computation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AnswerCache:
+    """
+    Thread-safe in-process TTL cache for finished graph results, keyed by
+    normalised question. Oldest entries are dropped once max_entries is hit.
+    """
+
+    def __init__(self, ttl_seconds: float = 4 * 3600, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < now:
+                self._data.pop(key, None)
+                return None
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data.pop(key, None)
+            while len(self._data) >= self.max_entries:
+                # dicts keep insertion order, so the first key is the oldest
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.time() + self.ttl_seconds, value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,184 @@
+# dish_matcher.py
+"""
+Fuzzy matcher for free-text dish references ("3 rotis", "paneer lababdar",
+"chole on sunday lunch") against the dish names of a menu.
+
+Built once per menu load. A lookup tries, in order: exact name, alias table,
+whole-word containment, then trigram candidates scored with a bounded edit
+distance. Stop-words, day words and meal words are ignored. Callers can pass
+the names of the meal being asked about; those win over other candidates,
+and remaining ties go to the dish listed first in the menu.
+"""
+
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+DAY_WORDS = {"monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday", "today", "tomorrow"}
+MEAL_WORDS = {"breakfast", "lunch", "dinner", "evening", "snack", "snacks", "midnight", "mess"}
+UNIT_WORDS = {"x", "plate", "plates", "bowl", "bowls", "portion", "portions", "piece", "pieces",
+              "serving", "servings", "glass", "glasses", "cup", "cups", "of", "a", "an", "the"}
+# Words that end an item phrase, e.g. "roti on sunday lunch" -> "roti"
+BOUNDARY_WORDS = {"and", "on", "for", "at", "from", "plus", "then", "also"} | DAY_WORDS | MEAL_WORDS
+STOP_WORDS = UNIT_WORDS | BOUNDARY_WORDS | {"how", "much", "many", "protein", "calories", "kcal", "get", "will", "i", "me", "my"}
+
+# Names that students use interchangeably; any member resolves to whichever one the menu has
+ALIAS_GROUPS = [
+    ("roti", "chapati", "chapatti", "phulka", "fulka"),
+    ("steamed rice", "rice", "plain rice", "chawal"),
+    ("chhole", "chole", "choley", "chana masala"),
+    ("idli", "idly"),
+    ("dosa", "dosai"),
+    ("curd", "dahi", "yogurt"),
+    ("corn flakes", "cornflakes"),
+]
+
+
+def _tokens(text: str) -> List[str]:
+    return re.sub(r"[^a-z0-9\s]", " ", (text or "").lower()).split()
+
+
+def _singular(word: str) -> str:
+    # "rotis" -> "roti", "idlis" -> "idli"; leave short words alone
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalise(text: str) -> str:
+    """Lowercase, drop punctuation and stop/day/meal words, singularise plurals."""
+    return " ".join(_singular(w) for w in _tokens(text) if w not in STOP_WORDS)
+
+
+def clean_item_phrase(text: str) -> str:
+    """
+    Trim a greedily captured item phrase: drop leading unit words and cut at
+    the first boundary word ("paneer lababdar and" -> "paneer lababdar").
+    """
+    words = _tokens(text)
+    while words and words[0] in UNIT_WORDS:
+        words.pop(0)
+    out = []
+    for w in words:
+        if w in BOUNDARY_WORDS:
+            break
+        out.append(w)
+    return " ".join(out)
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, bound: int) -> Optional[int]:
+    """Levenshtein distance, or None as soon as it must exceed bound (only a diagonal band is computed)."""
+    if abs(len(a) - len(b)) > bound:
+        return None
+    big = bound + 1
+    prev = [j if j <= bound else big for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - bound), min(len(b), i + bound)
+        cur = [big] * (len(b) + 1)
+        cur[0] = i if i <= bound else big
+        ca = a[i - 1]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] if ca == b[j - 1] else prev[j - 1] + 1
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            cur[j] = d
+        if min(cur[lo - 1:hi + 1]) > bound:
+            return None
+        prev = cur
+    return prev[-1] if prev[-1] <= bound else None
+
+
+class DishMatcher:
+    def __init__(self, names: Iterable[str], alias_groups=ALIAS_GROUPS, max_candidates: int = 8):
+        self.max_candidates = max_candidates
+        self.names: Dict[str, str] = {}  # normalised -> original name
+        for n in names:
+            key = normalise(n)
+            if key:
+                self.names.setdefault(key, n)
+        self.keys = list(self.names)
+        self.aliases: Dict[str, str] = {}
+        for group in alias_groups:
+            group = [normalise(g) for g in group]
+            target = next((g for g in group if g in self.names), None)
+            if target is None:
+                continue
+            for g in group:
+                self.aliases.setdefault(g, self.names[target])
+        self.index: Dict[str, Set[int]] = {}  # trigram -> name ids
+        self.words: Dict[str, Set[int]] = {}  # word -> name ids
+        for i, key in enumerate(self.keys):
+            for tg in trigrams(key):
+                self.index.setdefault(tg, set()).add(i)
+            for w in key.split():
+                self.words.setdefault(w, set()).add(i)
+
+    def match(self, text: str, prefer: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Best matching menu name for a free-text reference, or None.
+        prefer: original names (e.g. the requested meal's dishes) to favour.
+        """
+        q = normalise(text)
+        if not q:
+            return None
+        if q in self.names:
+            return self.names[q]
+        if q in self.aliases:
+            return self.aliases[q]
+
+        preferred = set(prefer or ())
+
+        # whole-word containment: "paneer" -> a dish named "Paneer ...", taking
+        # the preferred meal's dish first, then the one listed first in the menu
+        words = q.split()
+        ids = set(self.words.get(words[0], ()))
+        for w in words[1:]:
+            ids &= self.words.get(w, set())
+        contained = [i for i in ids if f" {q} " in f" {self.keys[i]} "]
+        if contained:
+            best = min(contained, key=lambda i: (self.names[self.keys[i]] not in preferred, i))
+            return self.names[self.keys[best]]
+
+        # fuzzy: rank by shared trigrams, then verify with a bounded edit distance
+        # (trigrams shared by a large share of the menu carry no signal and are skipped)
+        common = max(32, len(self.keys) // 4)
+        q_grams = trigrams(q)
+        skipped = 0
+        overlap: Dict[int, int] = {}
+        for tg in q_grams:
+            ids = self.index.get(tg, ())
+            if len(ids) > common:
+                skipped += 1
+                continue
+            for i in ids:
+                overlap[i] = overlap.get(i, 0) + 1
+        bound = max(1, len(q) // 4)
+        # count filter: each edit destroys at most 3 trigrams, so anything sharing
+        # fewer cannot be within the bound and is never scored
+        need = len(q_grams) - skipped - 3 * bound
+        overlap = {i: n for i, n in overlap.items() if n >= need}
+        if not overlap:
+            return None
+        ranked = heapq.nlargest(self.max_candidates, overlap, key=overlap.get)
+        best, best_score = None, None
+        for i in ranked:
+            key = self.keys[i]
+            # compare against the whole name and against its leading part, so a
+            # misspelt partial reference ("butter chiken") still finds the dish
+            d = bounded_edit_distance(q, key, bound)
+            partial = d is None
+            if partial:
+                d = bounded_edit_distance(q, key[:len(q)], bound)
+                if d is None:
+                    continue
+            score = (d, partial, self.names[key] not in preferred, i)
+            if best_score is None or score < best_score:
+                best, best_score = key, score
+        return self.names[best] if best is not None else None
@@ -1,10 +1,15 @@
-from retriever import get_retriever
-from prompts import DINING_PROMPT
+from retriever import get_index, serving_menu_digest
+from prompts import CONTEXT_HEADER, build_dining_messages, format_items_table
+from cache import SingleFlight, normalise_question
+from shared_cache import make_cache
+import logging
 import os
 from dotenv import load_dotenv
 load_dotenv()
 from langchain_openai import ChatOpenAI
 
+logger = logging.getLogger(__name__)
+
 
 # Try importing LangGraph (if installed)
 try:
@@ -16,33 +21,36 @@ except:
 
 def retrieve_node(state: dict):
     
-    retriever = get_retriever()
+    index = get_index()
+    # the menu this answer is built from; the answer cache keys on it
+    state["menu_digest"] = index.digest
     try:
-        docs = retriever.invoke(state["question"])
+        docs = index.retriever.invoke(state["question"])
     except Exception as e:
-        print("[Error invoking retriever]", e)
+        logger.warning("error invoking retriever: %s", e)
         # Propagate a readable error in state
         state["context"] = ""
         state["retrieve_error"] = str(e)
         return state
 
-    # Diagnostic: show type and small sample
-    print("DEBUG: retriever returned type:", type(docs), "len (if applicable):", getattr(docs, "__len__", lambda: None)())
+    # Diagnostic: show type and small sample (logged, since this also runs on the prewarm thread)
+    logger.debug("retriever returned type: %s, len (if applicable): %s", type(docs), getattr(docs, "__len__", lambda: None)())
     # If it's an iterator/generator, try to convert to list
     if not isinstance(docs, (list, tuple)):
         try:
             docs = list(docs)
-            print("DEBUG: converted docs to list, length:", len(docs))
+            logger.debug("converted docs to list, length: %d", len(docs))
         except Exception:
             # leave as-is
             pass
 
     # Build lines of plain text
     lines = []
+    has_rows = False  # True once a compact slot|item|tags|notes row was emitted
     for i, doc in enumerate(docs):
-        # Print diagnostics for first few items
+        # Log diagnostics for first few items
         if i < 3:
-            print(f"DEBUG: item {i} type: {type(doc)} -- repr start: {repr(doc)[:200]}")
+            logger.debug("item %d type: %s -- repr start: %s", i, type(doc), repr(doc)[:200])
 
         # Case A: doc is a langchain Document-like object with page_content attr
         if hasattr(doc, "page_content"):
@@ -62,17 +70,17 @@ def retrieve_node(state: dict):
             content = str(doc)
             meta = {}
 
-        # If metadata contains structured items (list of dicts), convert them into readable strings
+        # Retriever documents carry pre-rendered compact rows (slot|item|tags|notes)
+        if meta.get("items_compact"):
+            lines.append(meta["items_compact"])
+            has_rows = True
+            continue
+
+        # If metadata contains structured items (list of dicts), convert them into compact rows
         items = meta.get("items")
         if isinstance(items, (list, tuple)) and items and isinstance(items[0], dict):
-            item_strings = []
-            for it in items:
-                name = it.get("name", str(it))
-                tags = ", ".join(it.get("tags", [])) if isinstance(it.get("tags", []), (list,tuple)) else str(it.get("tags",""))
-                notes = it.get("notes","")
-                item_strings.append(f"{name} [{tags}] ({notes})".strip())
-            joined_items = ", ".join(item_strings)
-            lines.append(f"{meta.get('meal_time','')}: {joined_items}")
+            lines.append(format_items_table(meta.get("meal_time", ""), items))
+            has_rows = True
             continue
 
         # If content looks like JSON string of the structured data, attempt to parse
@@ -83,17 +91,8 @@ def retrieve_node(state: dict):
                 parsed = json.loads(content)
                 # If parsed is dict with metadata-like keys, format it
                 if isinstance(parsed, dict) and "items" in parsed:
-                    items = parsed.get("items", [])
-                    item_strings = []
-                    for it in items:
-                        if isinstance(it, dict):
-                            name = it.get("name", "")
-                            tags = ", ".join(it.get("tags", [])) if isinstance(it.get("tags", []), (list,tuple)) else str(it.get("tags",""))
-                            notes = it.get("notes","")
-                            item_strings.append(f"{name} [{tags}] ({notes})".strip())
-                        else:
-                            item_strings.append(str(it))
-                    lines.append(f"{parsed.get('meal_time','')}: " + ", ".join(item_strings))
+                    lines.append(format_items_table(parsed.get("meal_time", ""), parsed.get("items", [])))
+                    has_rows = True
                     continue
             except Exception:
                 pass
@@ -109,8 +108,8 @@ def retrieve_node(state: dict):
 
         lines.append(str(content))
 
-    # Final joined context must be a string
-    final_context = "\n".join(lines)
+    # Final joined context must be a string; the header is only added when it describes compact rows
+    final_context = "\n".join([CONTEXT_HEADER] + lines if has_rows else lines)
     state["context"] = final_context
     return state
 
@@ -125,13 +124,16 @@ def answer_node(state: dict):
         temperature=0.2
     )
 
-    prompt = DINING_PROMPT.format(
+    # Static instructions go first as the system message so the provider can
+    # cache them; the context is trimmed to the token budget before sending.
+    messages, tokens = build_dining_messages(
         context=state.get("context", ""),
         question=state.get("question", "")
     )
+    state["prompt_tokens"] = tokens
 
     # Modern LangChain call
-    response = llm.invoke(prompt)
+    response = llm.invoke(messages)
 
     # Extract the result text
     state["answer"] = response.content
@@ -165,6 +167,79 @@ else:
         return SimplePipeline()
 
 
+# ---- REQUEST COALESCING + ANSWER CACHE ----
+# Shared answer cache; filled by normal queries and by prewarm.py before each meal slot.
+# Backed by SQLite (shared between workers) when SHARED_CACHE_PATH is set.
+# Keys carry the digest of the menu the answer was retrieved from, so a menu
+# change makes old answers unreachable (they age out) without any worker
+# clearing the shared tier.
+ANSWER_CACHE = make_cache("answers", ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", 4 * 3600)))
+
+
+class CoalescedGraph:
+    """
+    Wraps a compiled graph so identical questions that arrive at the same
+    time share one retrieval + LLM call. Finished answers are stored in the
+    answer cache. Each caller gets its own copy of the resulting state.
+    """
+
+    def __init__(self, graph, cache=None, menu_digest=serving_menu_digest):
+        self.graph = graph
+        self.cache = cache
+        self.menu_digest = menu_digest
+        self.flight = SingleFlight()
+
+    def cache_key(self, question: str, digest: str = None) -> str:
+        """
+        '<menu digest>:<normalised question>', or '' for an empty question.
+        Without a digest, the one of the index currently serving requests is used.
+        """
+        q = normalise_question(question)
+        if not q:
+            return ""
+        return f"{digest or self.menu_digest()}:{q}"
+
+    def cached(self, question: str):
+        """Fresh cached answer for the current menu, or None."""
+        key = self.cache_key(question)
+        if not key or self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _run(self, key: str, state: dict):
+        result = self.graph.invoke(dict(state))
+        # only cache clean answers, never retrieval errors; stored under the
+        # menu that actually served the retrieval (the index may have been
+        # swapped between the lookup and the retrieval)
+        if self.cache is not None and result.get("answer") and not result.get("retrieve_error"):
+            digest = result.get("menu_digest")
+            if digest:
+                key = self.cache_key(state.get("question", ""), digest)
+            self.cache.set(key, dict(result))
+        return result
+
+    def invoke(self, state: dict):
+        question = state.get("question", "")
+        key = self.cache_key(question)
+        if not key:
+            return self.graph.invoke(dict(state))
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached)
+        result = self.flight.do(key, lambda: self._run(key, state))
+        return dict(result)
+
+    def refresh(self, question: str):
+        """Recompute an answer and overwrite the cached copy (used for prewarming)."""
+        key = self.cache_key(question)
+        return dict(self.flight.do(key, lambda: self._run(key, {"question": question})))
+
+
+def build_coalesced_graph(cache=ANSWER_CACHE):
+    return CoalescedGraph(build_graph(), cache=cache)
+
+
 # Manual test
 if __name__ == "__main__":
     graph = build_graph()
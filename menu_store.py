@@ -0,0 +1,155 @@
+# menu_store.py
+"""
+Hot-reloadable menu data.
+
+A MenuStore holds the parsed contents of one JSON menu file as an immutable
+MenuSnapshot. A background thread polls the file's mtime; when it changes
+the new version is parsed (and its derived indexes built) off the request
+path, then swapped in with a single reference assignment. Requests only
+ever call current(), which never touches the filesystem.
+
+Listeners registered with subscribe() run after each swap so caches built
+from the old menu can be dropped.
+"""
+
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_POLL_SECONDS = float(os.getenv("MENU_POLL_SECONDS", "2"))
+
+logger = logging.getLogger(__name__)
+
+
+def freeze(obj: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+class MenuSnapshot:
+    """One immutable version of a menu file plus whatever was derived from it."""
+
+    __slots__ = ("path", "version", "mtime_ns", "data", "derived")
+
+    def __init__(self, path: str, version: int, mtime_ns: Optional[int], data, derived: Dict[str, Any]):
+        self.path = path
+        self.version = version
+        self.mtime_ns = mtime_ns
+        self.data = data
+        self.derived = MappingProxyType(dict(derived))
+
+
+class MenuStore:
+    def __init__(self, path: str, derive: Optional[Dict[str, Callable[[Any], Any]]] = None,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS):
+        self.path = path
+        self.derive = dict(derive or {})
+        self.poll_seconds = poll_seconds
+        self._failed_mtime = None  # mtime of a version that failed to parse; not retried until it changes
+        self._listeners: List[Callable[[MenuSnapshot], None]] = []
+        self._lock = threading.Lock()  # serialises reloads, never taken by readers
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = self._build(self._read(), version=0)
+
+    # -- reading ------------------------------------------------------------
+    def _read(self):
+        """(mtime_ns, parsed data) or (None, {}) if the file is missing/unreadable."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                return mtime, json.load(f)
+        except FileNotFoundError:
+            logger.warning("%s not found; serving an empty menu until it appears", self.path)
+        except Exception as e:
+            logger.warning("could not load %s: %s", self.path, e)
+        return None, {}
+
+    def _build(self, loaded, version: int) -> MenuSnapshot:
+        mtime, data = loaded
+        data = freeze(data)
+        derived = {}
+        for name, fn in self.derive.items():
+            try:
+                derived[name] = fn(data)
+            except Exception as e:
+                logger.warning("building %r for %s failed: %s", name, self.path, e)
+        return MenuSnapshot(self.path, version, mtime, data, derived)
+
+    # -- public API -----------------------------------------------------------
+    def current(self) -> MenuSnapshot:
+        return self._snapshot
+
+    def add_derived(self, name: str, fn: Callable[[Any], Any]):
+        """Register an index built from every new version; built now for the current one too."""
+        with self._lock:
+            self.derive[name] = fn
+            snap = self._snapshot
+            self._snapshot = MenuSnapshot(snap.path, snap.version, snap.mtime_ns, snap.data,
+                                          dict(snap.derived, **{name: fn(snap.data)}))
+
+    def subscribe(self, fn: Callable[[MenuSnapshot], None]):
+        self._listeners.append(fn)
+
+    def reload_if_changed(self) -> bool:
+        """Re-parse the file if its mtime moved; returns True when a new snapshot was swapped in."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is None or mtime in (self._snapshot.mtime_ns, self._failed_mtime):
+            return False
+        with self._lock:
+            old = self._snapshot
+            if mtime == old.mtime_ns:
+                return False
+            loaded = self._read()
+            if loaded[0] is None:
+                # e.g. invalid JSON mid-edit: logged once, retried when the file changes again
+                self._failed_mtime = mtime
+                return False
+            self._snapshot = self._build(loaded, version=old.version + 1)
+        for fn in list(self._listeners):
+            try:
+                fn(self._snapshot)
+            except Exception as e:
+                logger.warning("listener failed after reloading %s: %s", self.path, e)
+        return True
+
+    def _loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.reload_if_changed()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f"menu-watch:{self.path}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_STORES: Dict[str, MenuStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path: str) -> MenuStore:
+    """Shared, already-watching store for a menu file (one per path per process)."""
+    key = os.path.abspath(path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = MenuStore(path).start()
+            _STORES[key] = store
+        return store
@@ -0,0 +1,149 @@
+# nutrient_engine.py
+"""
+Vectorised nutrient lookups over the weekly menu.
+
+Every (day, item) in menu_week.json becomes one row of a NumPy matrix with
+columns NUTRIENTS. Names are resolved through an index and a per-day
+DishMatcher built once per menu load, so a single portion query and a bulk
+"log my whole day" summary for thousands of users both come down to a
+gather + weighted sum.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from dish_matcher import DishMatcher
+
+NUTRIENTS = ("calories", "protein", "fats", "carbs")
+# column positions in nutrient vectors, so callers never hard-code indices
+CALORIES = NUTRIENTS.index("calories")
+PROTEIN = NUTRIENTS.index("protein")
+FATS = NUTRIENTS.index("fats")
+CARBS = NUTRIENTS.index("carbs")
+
+
+class NutrientEngine:
+    def __init__(self, menu_week: Dict[str, Any]):
+        self.items: List[Dict[str, Any]] = []
+        # (day, lowercase name) -> row; a dish listed in several meals keeps the last one
+        self.index: Dict[Tuple[str, str], int] = {}
+        # (day, meal, lowercase name) -> row, used when the request names a meal
+        self.meal_index: Dict[Tuple[str, str, str], int] = {}
+        self.day_names: Dict[str, Dict[str, int]] = {}
+        self.meal_names: Dict[Tuple[str, str], List[str]] = {}
+        rows = []
+        for day, meals in menu_week.items():
+            names = self.day_names.setdefault(day, {})
+            for meal, meal_items in meals.items():
+                for it in meal_items:
+                    row = len(self.items)
+                    self.items.append(it)
+                    rows.append([float(it.get(n, 0) or 0) for n in NUTRIENTS])
+                    key = it["name"].lower()
+                    self.index[(day, key)] = row
+                    self.meal_index[(day, meal, key)] = row
+                    self.meal_names.setdefault((day, meal), []).append(it["name"])
+                    names[key] = row
+        self.matrix = np.asarray(rows, dtype=float).reshape(-1, len(NUTRIENTS))
+        # names are fed in menu order, which the matcher uses to break ties
+        self.matchers = {day: DishMatcher(self.items[r]["name"] for r in names.values())
+                         for day, names in self.day_names.items()}
+
+    def resolve(self, day: str, name: str, meal: Optional[str] = None) -> Optional[int]:
+        """
+        Row for a dish name on a day: exact lowercase match (within the meal
+        first, if one is given), then the fuzzy matcher favouring that meal.
+        """
+        name = (name or "").lower().strip()
+        row = self.meal_index.get((day, meal, name)) if meal else None
+        if row is None:
+            row = self.index.get((day, name))
+        if row is not None:
+            return row
+        matcher = self.matchers.get(day)
+        if not name or matcher is None:
+            return None
+        found = matcher.match(name, prefer=self.meal_names.get((day, meal)) if meal else None)
+        if not found:
+            return None
+        key = found.lower()
+        row = self.meal_index.get((day, meal, key)) if meal else None
+        return row if row is not None else self.index.get((day, key))
+
+    def portion(self, day: str, entries: List[Dict[str, Any]], meal: Optional[str] = None):
+        """
+        Resolve [{"qty":..,"name":..}, ...] for one day (and meal, if known).
+        Returns (results, total): results keeps the input order as
+        (entry, qty, item, vector) with item/vector None when the name did not
+        resolve, and total is the summed nutrient vector.
+        """
+        rows = [self.resolve(day, e.get("name", ""), meal) for e in entries]
+        qtys = np.asarray([float(e.get("qty", 0)) for e in entries])
+        hit = [i for i, r in enumerate(rows) if r is not None]
+        vectors = np.zeros((len(entries), len(NUTRIENTS)))
+        if hit:
+            vectors[hit] = self.matrix[[rows[i] for i in hit]] * qtys[hit][:, None]
+        results = []
+        for i, entry in enumerate(entries):
+            if rows[i] is None:
+                results.append((entry, float(qtys[i]), None, None))
+            else:
+                results.append((entry, float(qtys[i]), self.items[rows[i]], vectors[i]))
+        return results, vectors.sum(axis=0)
+
+    def bulk_totals(self, logs: List[List[Dict[str, Any]]]):
+        """
+        Daily totals for many users at once.
+        logs[u] is a list of {"day":.., "name":.., "qty":..} entries for user u,
+        optionally with a "meal" key.
+        Returns (totals, unmatched): totals is an (n_users, len(NUTRIENTS)) array,
+        unmatched counts the entries per user that could not be resolved.
+        """
+        cache: Dict[Tuple[str, str, Optional[str]], Optional[int]] = {}
+        users, rows, qtys = [], [], []
+        unmatched = np.zeros(len(logs), dtype=int)
+        for u, log in enumerate(logs):
+            for entry in log:
+                key = (entry.get("day"), entry.get("name", ""), entry.get("meal"))
+                if key not in cache:
+                    cache[key] = self.resolve(*key)
+                row = cache[key]
+                if row is None:
+                    unmatched[u] += 1
+                    continue
+                users.append(u)
+                rows.append(row)
+                qtys.append(float(entry.get("qty", 0)))
+        totals = np.zeros((len(logs), len(NUTRIENTS)))
+        if rows:
+            np.add.at(totals, np.asarray(users), self.matrix[rows] * np.asarray(qtys)[:, None])
+        return totals, unmatched
+
+    def daily_summaries(self, logs: List[List[Dict[str, Any]]]) -> List[Dict[str, float]]:
+        """bulk_totals() as one {nutrient: value, "unmatched": n} dict per user."""
+        totals, unmatched = self.bulk_totals(logs)
+        out = []
+        for vec, miss in zip(totals, unmatched):
+            summary = {n: float(v) for n, v in zip(NUTRIENTS, vec)}
+            summary["unmatched"] = int(miss)
+            out.append(summary)
+        return out
+
+
+# Manual regression checks against the real weekly menu: python nutrient_engine.py
+if __name__ == "__main__":
+    from nutrition_ui import execute_parsed, heuristic_parse
+
+    # "paneer" at Sunday lunch is Paneer Lababdar (lunch), not Paneer Kulcha (midnight_mess)
+    parsed = heuristic_parse("1 paneer on sunday lunch")
+    assert parsed["meal"] == "lunch" and parsed["items"] == [{"qty": 1.0, "name": "paneer"}], parsed
+    out = execute_parsed(parsed)
+    assert "Paneer Lababdar" in out, out
+    # without a meal the dish listed first in the day's menu wins
+    out = execute_parsed(heuristic_parse("1 paneer on sunday"))
+    assert "Paneer Lababdar" in out, out
+    # digits belong to the dish name; only a number followed by a dish starts a new item
+    parsed = heuristic_parse("2 chicken 65 and 3 roti on friday lunch")
+    assert parsed["items"] == [{"qty": 2.0, "name": "chicken 65"}, {"qty": 3.0, "name": "roti"}], parsed
+    print("OK")
@@ -4,6 +4,12 @@ import os
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
+from dish_matcher import BOUNDARY_WORDS, clean_item_phrase
+from cache import normalise_question
+from menu_store import get_store
+from nutrient_engine import CALORIES, PROTEIN, NutrientEngine
+from shared_cache import make_cache
+
 try:
     from dotenv import load_dotenv
 
@@ -12,11 +18,34 @@ except Exception:
     pass
 
 MENU_FILE = Path("menu_week.json")
-if not MENU_FILE.exists():
-    raise FileNotFoundError("menu_week.json not found. Add your weekly menu JSON file.")
 
-with open(MENU_FILE, "r", encoding="utf-8") as f:
-    MENU_WEEK = json.load(f)
+# Weekly menu is watched and hot-reloaded in the background; the nutrient
+# matrix + name index is rebuilt with every new version and swapped in with it.
+WEEK_STORE = get_store(str(MENU_FILE))
+WEEK_STORE.add_derived("engine", NutrientEngine)
+
+# "<qty> <item>": digits may appear inside a name ("2 chicken 65"); the name
+# stops only where a new quantity starts, i.e. a number followed by a word
+# that is not a connector/day/meal word ("... and 3 roti", not "65 on sunday"),
+# or at punctuation
+ITEM_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)\s*([a-z][a-z0-9 \-']*?)"
+    r"(?=\s+\d+(?:\.\d+)?\s+(?!(?:%s)\b)[a-z]|[^a-z0-9 \-']|$)" % "|".join(sorted(BOUNDARY_WORDS))
+)
+
+
+def menu_week():
+    """Current weekly menu snapshot (never blocks on file I/O)."""
+    return WEEK_STORE.current().data
+
+
+def nutrient_engine() -> NutrientEngine:
+    return WEEK_STORE.current().derived["engine"]
+
+
+# Parsed intents by normalised request text, so repeated requests skip the LLM
+# parse (shared between workers when SHARED_CACHE_PATH is set)
+INTENT_CACHE = make_cache("intents", ttl_seconds=float(os.getenv("INTENT_CACHE_TTL", 24 * 3600)), max_entries=4096)
 
 USE_LANGCHAIN = False
 USE_LANGGRAPH = False
@@ -94,7 +123,7 @@ def find_meal(text: str) -> Optional[str]:
 def handle_menu_lookup(day: Optional[str], meal: Optional[str]) -> str:
     if not day or not meal:
         return "Please specify the day and meal (e.g., 'monday lunch')."
-    items = MENU_WEEK.get(day, {}).get(meal, [])
+    items = menu_week().get(day, {}).get(meal, [])
     if not items:
         return f"No menu found for {meal} on {day}."
     lines = [f"Menu -> {day.capitalize()} / {meal.replace('_',' ')}:\n"]
@@ -107,7 +136,7 @@ def handle_menu_lookup(day: Optional[str], meal: Optional[str]) -> str:
 def handle_protein_target(day: Optional[str], meal: Optional[str], target: Optional[float]) -> str:
     if not day or not meal or not target:
         return "I need day, meal and a protein target (e.g., 'I need 30 protein for dinner on friday')."
-    items = MENU_WEEK.get(day, {}).get(meal, [])
+    items = menu_week().get(day, {}).get(meal, [])
     if not items:
         return f"No items available for {meal} on {day}."
     # choose a multi-item greedy plan rather than single item. We will return integer portions; try to minimize portions.
@@ -143,35 +172,17 @@ def handle_protein_target(day: Optional[str], meal: Optional[str], target: Optio
     return "\n".join(lines)
 
 
-def handle_portion_calc(day: Optional[str], items: List[Dict[str,Any]]) -> str:
+def handle_portion_calc(day: Optional[str], items: List[Dict[str,Any]], meal: Optional[str] = None) -> str:
     if not day or not items:
         return "Provide day and items with quantities (e.g., '2.5 Paneer Lababdar and 3 roti on sunday lunch')."
-    # build lookup
-    lookup = {}
-    for meal_items in MENU_WEEK.get(day, {}).values():
-        for it in meal_items:
-            lookup[it['name'].lower()] = it
     results = []
-    total_prot = 0.0
-    total_cal = 0.0
-    for entry in items:
-        qty = float(entry.get("qty", 0))
-        name = entry.get("name","").lower().strip()
-        found = lookup.get(name)
-        if not found:
-            # try substring match
-            for k,v in lookup.items():
-                if name in k:
-                    found = v
-                    break
-        if not found:
+    matched, total = nutrient_engine().portion(day, items, meal)
+    for entry, qty, found, vec in matched:
+        if found is None:
             results.append(f"- Could not find item '{entry.get('name')}' on {day}")
             continue
-        p = qty * found.get("protein", 0)
-        c = qty * found.get("calories", 0)
-        total_prot += p
-        total_cal += c
-        results.append(f"- {qty} x {found['name']} -> protein {p:.1f}g, calories {c:.1f} kcal")
+        results.append(f"- {qty} x {found['name']} -> protein {vec[PROTEIN]:.1f}g, calories {vec[CALORIES]:.1f} kcal")
+    total_cal, total_prot = total[CALORIES], total[PROTEIN]
     if not results:
         return "No items matched."
     results.append(f"\nTotal protein: {total_prot:.1f}g | Total calories: {total_cal:.1f} kcal")
@@ -181,7 +192,7 @@ def handle_portion_calc(day: Optional[str], items: List[Dict[str,Any]]) -> str:
 def handle_full_day_plan(day: Optional[str], target: Optional[int]) -> str:
     if not day or not target:
         return "Need day and calorie target (e.g., 'planner for wednesday 1500 calories')."
-    day_data = MENU_WEEK.get(day, {})
+    day_data = menu_week().get(day, {})
     if not day_data:
         return f"No menu info for {day}."
     # Simple integer partition: split target into 3 roughly equal parts (breakfast/lunch/dinner)
@@ -323,6 +334,10 @@ def parse_user_with_llm(user_text: str) -> Dict[str,Any]:
     """Return intent dict parsed by LLM or None if parse fails."""
     if not USE_LANGCHAIN or llm is None:
         return None
+    key = normalise_question(user_text)
+    cached = INTENT_CACHE.get(key) if key else None
+    if cached is not None:
+        return cached
     # call LLM
     resp = robust_llm_call(user_text)
     if not resp:
@@ -335,9 +350,11 @@ def parse_user_with_llm(user_text: str) -> Dict[str,Any]:
         j = j[i:k+1]
     try:
         parsed = json.loads(j)
-        return parsed
     except Exception:
         return None
+    if key and isinstance(parsed, dict):
+        INTENT_CACHE.set(key, parsed)
+    return parsed
 
 
 # ---------- Heuristic fallback parser ----------
@@ -356,11 +373,14 @@ def heuristic_parse(text: str) -> Dict[str,Any]:
         target = float(m.group(1))
         return {"action":"protein","day":day,"meal":meal,"target":target,"items":[]}
     # portion calc: find qty+item patterns
-    parts = re.findall(r"(\d+(\.\d+)?)\s*([A-Za-z][A-Za-z0-9 \-']+)", t)
+    parts = ITEM_PATTERN.findall(t)
     items = []
     for p in parts:
         qty = float(p[0])
-        name = p[2].strip()
+        # the phrase runs up to the next quantity ("roti on sunday lunch"); cut at connector/day/meal words
+        name = clean_item_phrase(p[1])
+        if not name:
+            continue
         items.append({"qty":qty,"name":name})
     if items:
         return {"action":"portion_calc","day":day,"meal":meal,"target":None,"items":items}
@@ -418,7 +438,7 @@ def execute_parsed(parsed: Dict[str,Any]) -> str:
     if action == "protein":
         return handle_protein_target(day, meal, parsed.get("target"))
     if action == "portion_calc":
-        return handle_portion_calc(parsed.get("day"), parsed.get("items", []))
+        return handle_portion_calc(parsed.get("day"), parsed.get("items", []), meal)
     if action == "plan":
         return handle_full_day_plan(day, parsed.get("target"))
     return "I couldn't understand your request. Type 'help' for examples."
@@ -0,0 +1,127 @@
+# prewarm.py
+"""
+Background scheduler that fills the answer cache shortly before each meal
+slot opens, so the first student asking "What is available for lunch?"
+gets an instant answer instead of waiting on retrieval + the LLM.
+
+It also subscribes to the menu stores for menu.json / menu_week.json and,
+when either is reloaded, re-warms the current/upcoming slot. Answers are
+keyed by menu digest, so nothing is cleared; questions that already have a
+fresh entry for the current menu (e.g. warmed by another worker through the
+shared cache) are skipped.
+"""
+
+import datetime as dt
+import logging
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from menu_store import get_store
+
+MENU_FILES = ("menu.json", "menu_week.json")
+
+logger = logging.getLogger(__name__)
+
+
+def slot_start(times: str) -> dt.time:
+    """'12:00 - 15:00' -> time(12, 0)"""
+    start = times.split("-")[0].strip()
+    hour, minute = start.split(":")
+    return dt.time(int(hour), int(minute))
+
+
+def canonical_questions(meal: str) -> List[str]:
+    """The questions students predictably ask for a slot (same wording as run.py)."""
+    return [f"What is available for {meal}?"]
+
+
+class PrewarmScheduler:
+    """
+    Polls the clock every poll_seconds. When a slot is within lead_minutes of
+    opening (or already open), its canonical questions are recomputed through
+    graph.refresh(), once per slot per day; a slot whose refreshes all failed
+    is retried on the next tick. A menu reload re-warms every slot
+    that is due without waiting for the next poll.
+    """
+
+    def __init__(self, graph, meal_options, lead_minutes: int = 10, poll_seconds: float = 30,
+                 menu_files: Iterable[str] = MENU_FILES):
+        self.graph = graph
+        self.meal_options = list(meal_options)
+        self.lead = dt.timedelta(minutes=lead_minutes)
+        self.poll_seconds = poll_seconds
+        self._warmed = set()  # (date, meal) already warmed
+        self._menu_changed = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        for path in menu_files:
+            get_store(path).subscribe(self._on_menu_reload)
+
+    def _on_menu_reload(self, snapshot):
+        self._menu_changed.set()
+        self._wake.set()
+
+    def due_slots(self, now: dt.datetime) -> List[Tuple[str, dt.date]]:
+        """(meal, slot date) for slots that open within the lead window or are currently open."""
+        due = []
+        for meal, times in self.meal_options:
+            start_t = slot_start(times)
+            end_t = slot_start(times.split("-")[1])
+            # check yesterday too, so a slot running past midnight stays due
+            for days_back in (0, 1):
+                date = now.date() - dt.timedelta(days=days_back)
+                start = dt.datetime.combine(date, start_t)
+                end = dt.datetime.combine(date, end_t)
+                if end <= start:  # slot runs past midnight (midnight_mess)
+                    end += dt.timedelta(days=1)
+                if start - self.lead <= now < end:
+                    due.append((meal, date))
+                    break
+        return due
+
+    def warm(self, meal: str, date: dt.date) -> bool:
+        """Refresh the slot's questions; the slot only counts as warmed if one succeeded."""
+        ok = False
+        cached = getattr(self.graph, "cached", None)
+        for q in canonical_questions(meal):
+            if cached is not None and cached(q) is not None:
+                ok = True
+                continue
+            try:
+                self.graph.refresh(q)
+                ok = True
+            except Exception as e:
+                logger.warning("prewarm failed for %r: %s", q, e)
+        if ok:
+            self._warmed.add((date, meal))
+        return ok
+
+    def tick(self, now: Optional[dt.datetime] = None):
+        now = now or dt.datetime.now()
+        if self._menu_changed.is_set():
+            self._menu_changed.clear()
+            logger.info("menu changed, re-warming due slots")
+            self._warmed.clear()
+        for meal, date in self.due_slots(now):
+            if (date, meal) not in self._warmed:
+                self.warm(meal, date)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.tick()
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
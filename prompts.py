@@ -1,6 +1,11 @@
 # prompts.py
+import os
+from collections.abc import Mapping
 
-DINING_PROMPT = """
+# Static instructions. Kept byte-for-byte identical across requests and placed
+# first, so provider-side prompt caching can reuse it; only the retrieved
+# context and question (the suffix) change per request.
+DINING_PROMPT_PREFIX = """
 You are the official assistant for the college Dining Hall.
 
 Today's menu contains 5 meal timings:
@@ -13,6 +18,11 @@ Today's menu contains 5 meal timings:
 
 Use ONLY the retrieved menu items to answer the student's question.
 
+When the menu data starts with the header line below, it is a table with
+one item per row:
+slot|item|tags|notes
+Tags are comma separated; notes may be empty.
+
 RULES:
 - If the user asks for vegetarian → show only vegetarian items.
 - If the user asks for healthy → choose low-oil/simple items.
@@ -20,11 +30,99 @@ RULES:
 - If they ask about a specific meal timing → show items from that slot.
 - If the query cannot be answered → politely say so.
 
+Give a short, friendly, helpful answer.
+"""
+
+DINING_PROMPT_SUFFIX = """
 Menu Data (retrieved through RAG):
 {context}
 
 Question:
 {question}
-
-Give a short, friendly, helpful answer.
 """
+
+# Single-string form, kept for callers that still format one prompt
+DINING_PROMPT = DINING_PROMPT_PREFIX + DINING_PROMPT_SUFFIX
+
+CONTEXT_HEADER = "slot|item|tags|notes"
+
+# Token budget for the retrieved context (the static prefix is not counted)
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "1200"))
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken; rough 4-chars-per-token estimate if it is unavailable."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def item_row(slot: str, item: dict) -> str:
+    """One compact table row: slot|item|tags|notes"""
+    tags = item.get("tags", [])
+    if isinstance(tags, (list, tuple)):
+        tags = ",".join(tags)
+    fields = [slot, item.get("name", ""), str(tags or ""), str(item.get("notes", "") or "")]
+    return "|".join(f.replace("|", "/").strip() for f in fields)
+
+
+def format_items_table(slot: str, items) -> str:
+    """Rows (without header) for every item of a meal slot."""
+    return "\n".join(item_row(slot, it) for it in items if isinstance(it, Mapping))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text that fits in max_tokens (binary search on characters)."""
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def trim_context(context: str, max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
+    """
+    Drop whole rows from the end until the context fits in max_tokens.
+    The first row (and the header before it) is always kept, cut by characters
+    if it alone is over budget, so the model never gets an empty context.
+    """
+    if count_tokens(context) <= max_tokens:
+        return context
+    lines = context.split("\n")
+    required = 2 if lines[0] == CONTEXT_HEADER else 1
+    keep = []
+    used = 0
+    for i, line in enumerate(lines):
+        cost = count_tokens(line + "\n")
+        if used + cost > max_tokens:
+            if i < required:
+                # never drop the header; cut the first row to what is left (at least one token)
+                keep.append(line if i + 1 < required else truncate_to_tokens(line, max(max_tokens - used, 1)))
+                used += cost
+                continue
+            break
+        keep.append(line)
+        used += cost
+    return "\n".join(keep)
+
+
+def build_dining_messages(context: str, question: str, max_context_tokens: int = MAX_CONTEXT_TOKENS):
+    """
+    Return ([("system", prefix), ("human", suffix)], total_tokens).
+    The system message is the cacheable static prefix.
+    """
+    context = trim_context(context or "", max_context_tokens)
+    human = DINING_PROMPT_SUFFIX.format(context=context, question=question or "")
+    tokens = count_tokens(DINING_PROMPT_PREFIX) + count_tokens(human)
+    return [("system", DINING_PROMPT_PREFIX), ("human", human)], tokens
@@ -2,17 +2,28 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import hashlib
 import json
+import logging
+import os
+import threading
+from menu_store import get_store
+from prompts import format_items_table
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 
 
-def load_menu_documents(menu_file="menu.json"):
-    
-    with open(menu_file, "r", encoding="utf-8") as f:
-        menu_data = json.load(f)
+MENU_FILE = "menu.json"
+
+logger = logging.getLogger(__name__)
+
+# menu.json is watched and hot-reloaded in the background; its documents are
+# rebuilt with every new version so requests never read the file themselves.
+MENU_STORE = get_store(MENU_FILE)
+
 
+def menu_to_documents(menu_data):
     docs = []
     for meal_time, items in menu_data.items():
 
@@ -30,7 +41,8 @@ def load_menu_documents(menu_file="menu.json"):
         
         metadata = {
             "meal_time": meal_time,
-            "items_joined": "; ".join(readable_items)  # keep readable list as ONE string
+            "items_joined": "; ".join(readable_items),  # keep readable list as ONE string
+            "items_compact": format_items_table(meal_time, items)  # slot|item|tags|notes rows for the prompt
         }
 
         docs.append(Document(page_content=content, metadata=metadata))
@@ -38,18 +50,131 @@ def load_menu_documents(menu_file="menu.json"):
     return docs
 
 
-def create_vectorstore(docs):
+MENU_STORE.add_derived("documents", menu_to_documents)
+
+
+def load_menu_documents(menu_file=MENU_FILE):
+    if menu_file == MENU_FILE:
+        return list(MENU_STORE.current().derived["documents"])
+    with open(menu_file, "r", encoding="utf-8") as f:
+        return menu_to_documents(json.load(f))
+
+
+# When set, the Chroma index is persisted here and shared by every worker
+# process, so the menu is embedded once per menu version rather than once per worker.
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR")
+
+
+def menu_digest(docs):
+    """Content hash of the menu documents; identical menus map to the same persisted collection."""
+    h = hashlib.sha1()
+    for d in docs:
+        h.update(d.page_content.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+MENU_STORE.add_derived("digest", lambda data: menu_digest(menu_to_documents(data)))
+
+
+def serving_menu_digest():
+    """Content hash of the menu the serving index was built from; identical across workers."""
+    return get_index().digest
+
+
+def create_vectorstore(docs, collection_name="dining_menu"):
     embeddings = OpenAIEmbeddings()
+    if CHROMA_PERSIST_DIR:
+        vectordb = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            persist_directory=CHROMA_PERSIST_DIR
+        )
+        # another worker may already have embedded this exact menu
+        if not vectordb.get(limit=1)["ids"]:
+            vectordb.add_documents(docs, ids=[d.metadata["meal_time"] for d in docs])
+        return vectordb
     vectordb = Chroma.from_documents(
         docs,
         embedding=embeddings,
-        collection_name="dining_menu"
+        collection_name=collection_name
     )
     return vectordb
 
 
-def get_retriever():
-    docs = load_menu_documents()
-    vectordb = create_vectorstore(docs)
-    return vectordb.as_retriever(search_kwargs={"k": 4})
+class _Index:
+    """The vector index built from one menu snapshot."""
+
+    __slots__ = ("version", "digest", "vectordb", "retriever")
+
+    def __init__(self, version, digest, vectordb, retriever):
+        self.version = version
+        self.digest = digest
+        self.vectordb = vectordb
+        self.retriever = retriever
+
+
+# Index currently serving requests; embeddings are only recomputed when the menu changes
+_INDEX = None
+_INDEX_LOCK = threading.Lock()  # serialises builds, never taken on the fast path
+_REBUILDING = threading.Event()  # set while the watcher thread re-indexes a new menu
+
+
+def _build_index(snapshot):
+    docs = list(snapshot.derived["documents"])
+    digest = snapshot.derived["digest"]
+    vectordb = create_vectorstore(docs, collection_name=f"dining_menu_{digest}")
+    return _Index(snapshot.version, digest, vectordb, vectordb.as_retriever(search_kwargs={"k": 4}))
+
+
+def _swap_index(snapshot):
+    """Build (or reuse) the index for snapshot and make it the serving one. Caller holds _INDEX_LOCK."""
+    global _INDEX
+    old = _INDEX
+    if old is not None and old.digest == snapshot.derived["digest"]:
+        # file touched but content unchanged: keep the existing embeddings
+        _INDEX = _Index(snapshot.version, old.digest, old.vectordb, old.retriever)
+        return _INDEX
+    _INDEX = _build_index(snapshot)
+    if old is not None and not CHROMA_PERSIST_DIR:
+        # in-process collections are never reused once replaced; free the old one
+        try:
+            old.vectordb.delete_collection()
+        except Exception as e:
+            logger.warning("could not drop old collection: %s", e)
+    return _INDEX
 
+
+def _rebuild_index(snapshot):
+    """Runs on the menu watcher thread: re-index the new menu, then swap it in."""
+    _REBUILDING.set()
+    try:
+        with _INDEX_LOCK:
+            _swap_index(snapshot)
+    finally:
+        _REBUILDING.clear()
+
+
+MENU_STORE.subscribe(_rebuild_index)
+
+
+def get_index():
+    """
+    Index matching the current menu snapshot. While the watcher thread is
+    re-indexing a new menu the previous index keeps serving; otherwise a
+    lagging index (e.g. a failed background rebuild) is rebuilt here.
+    """
+    snapshot = MENU_STORE.current()
+    index = _INDEX
+    if index is not None and (index.version == snapshot.version or _REBUILDING.is_set()):
+        return index
+    with _INDEX_LOCK:
+        index = _INDEX
+        snapshot = MENU_STORE.current()
+        if index is None or index.version != snapshot.version:
+            index = _swap_index(snapshot)
+        return index
+
+
+def get_retriever():
+    return get_index().retriever
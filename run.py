@@ -11,9 +11,12 @@ from rich.panel import Panel
 from rich.prompt import Prompt, IntPrompt
 from rich.markdown import Markdown
 from rich.text import Text
+import os
 import sys
 import time
 
+from session_log import SessionRecorder
+
 console = Console()
 MEAL_OPTIONS = [
     ("breakfast", "07:00 - 10:00"),
@@ -25,14 +28,27 @@ MEAL_OPTIONS = [
 
 # Try to import your graph builder
 try:
-    from graph import build_graph
+    from graph import build_coalesced_graph
+    from prewarm import PrewarmScheduler
 except Exception as e:
-    console.print("[red]Error:[/red] could not import build_graph from graph.py")
+    console.print("[red]Error:[/red] could not import build_coalesced_graph from graph.py")
     console.print(str(e))
     sys.exit(1)
 
-# Build graph once (this may call embeddings & llm when invoked)
-graph = build_graph()
+# Build graph once (this may call embeddings & llm when invoked).
+# Concurrent identical questions share a single in-flight graph run.
+graph = build_coalesced_graph()
+
+# Precompute the canonical "What is available for {meal}?" answers shortly
+# before each slot opens, and again whenever the menu files change.
+prewarmer = PrewarmScheduler(graph, MEAL_OPTIONS)
+
+# Every result is appended to one rotating JSONL log by a background thread,
+# so the loop can move straight on to the next question.
+recorder = SessionRecorder(
+    path=os.getenv("SESSION_LOG_PATH", "session_log.jsonl"),
+    compress=os.getenv("SESSION_LOG_COMPRESS", "0") == "1",
+)
 
 def show_header():
     header = Text("Dining Hall AI Assistant", style="bold white on blue")
@@ -54,18 +70,19 @@ def show_menu():
 
 def query_graph(question: str):
     """
-    Invoke the graph and return (context, answer) strings.
+    Invoke the graph and return (context, answer, seconds) for the call.
     """
+    start = time.perf_counter()
     try:
         result = graph.invoke({"question": question})
     except Exception as e:
         # show helpful error
-        return None, f"[Error invoking graph] {e}"
+        return None, f"[Error invoking graph] {e}", time.perf_counter() - start
     ctx = result.get("context", "")
     ans = result.get("answer", "")
-    return ctx, ans
+    return ctx, ans, time.perf_counter() - start
 
-def pretty_print_result(question: str, context: str, answer: str):
+def pretty_print_result(question: str, context: str, answer: str, elapsed: float = 0.0):
     console.rule("[bold green]Result[/bold green]")
     console.print(Panel(Text(question, style="bold"), title="Question"))
 
@@ -74,22 +91,12 @@ def pretty_print_result(question: str, context: str, answer: str):
     # Answer panel
     console.print(Panel(Markdown(answer), title="Assistant Answer", subtitle="Friendly response", padding=(1,1)))
 
-    # Optionally save to file
-    save = Prompt.ask("Save this result to a file? (y/n)", choices=["y","n"], default="n")
-    if save == "y":
-        timestamp = int(time.time())
-        fname = f"result_{timestamp}.txt"
-        with open(fname, "w", encoding="utf-8") as f:
-            f.write("Question:\n")
-            f.write(question + "\n\n")
-            f.write("Context:\n")
-            f.write(context + "\n\n")
-            f.write("Answer:\n")
-            f.write(answer + "\n")
-        console.print(f"[green]Saved to {fname}[/green]")
+    # Logged in the background to the session log; no prompt between queries
+    recorder.record(question, context, answer, timings={"graph_seconds": round(elapsed, 3)})
 
 def main_loop():
     show_header()
+    prewarmer.start()
     while True:
         show_menu()
         try:
@@ -112,23 +119,27 @@ def main_loop():
                 console.print("[red]Empty question. Try again.[/red]")
                 continue
             console.print("[cyan]Querying assistant...[/cyan]")
-            ctx, ans = query_graph(q)
+            ctx, ans, elapsed = query_graph(q)
             if ctx is None:
                 console.print(f"[red]{ans}[/red]")
+                recorder.record(q, "", "", timings={"graph_seconds": round(elapsed, 3)}, error=ans)
             else:
-                pretty_print_result(q, ctx, ans)
+                pretty_print_result(q, ctx, ans, elapsed)
         else:
             meal_key = MEAL_OPTIONS[choice-1][0]
             q = f"What is available for {meal_key}?"
             console.print(f"[cyan]Querying assistant for {meal_key}...[/cyan]")
-            ctx, ans = query_graph(q)
+            ctx, ans, elapsed = query_graph(q)
             if ctx is None:
                 console.print(f"[red]{ans}[/red]")
+                recorder.record(q, "", "", timings={"graph_seconds": round(elapsed, 3)}, error=ans)
             else:
-                pretty_print_result(q, ctx, ans)
+                pretty_print_result(q, ctx, ans, elapsed)
 
 if __name__ == "__main__":
     try:
         main_loop()
     except KeyboardInterrupt:
         console.print("\n[bold yellow]Interrupted. Bye![/bold yellow]")
+    finally:
+        recorder.close()
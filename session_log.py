@@ -0,0 +1,107 @@
+# session_log.py
+"""
+Non-blocking session recorder for run.py.
+
+record() only puts an entry on a queue; a background thread appends entries
+to a single JSONL log in batches (every flush_every entries or flush_seconds,
+whichever comes first). When the log grows past max_bytes it is rotated to
+<name>-<timestamp>.jsonl, gzip-compressed if compress is set.
+"""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class SessionRecorder:
+    def __init__(self, path: str = "session_log.jsonl", flush_every: int = 20, flush_seconds: float = 2.0,
+                 max_bytes: int = 10 * 1024 * 1024, compress: bool = False):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self._thread.start()
+
+    def record(self, question: str, context: str, answer: str, timings: Optional[Dict[str, float]] = None, **extra):
+        """Queue one question/answer for writing; never blocks the caller."""
+        entry = {
+            "ts": time.time(),
+            "question": question,
+            "context": context,
+            "answer": answer,
+            "timings": timings or {},
+        }
+        entry.update(extra)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # better to lose a log line than to stall the interactive loop
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush everything still queued and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    # -- writer thread ------------------------------------------------------
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._write(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.flush_every or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch))
+        except Exception as e:
+            logger.warning("write failed: %s", e)
+
+    def _rotate_if_needed(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.max_bytes:
+            return
+        base, ext = os.path.splitext(self.path)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        rotated = f"{base}-{stamp}{ext}"
+        n = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{base}-{stamp}-{n}{ext}"
+            n += 1
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
@@ -0,0 +1,106 @@
+# shared_cache.py
+"""
+Cache tier that several worker processes on one machine can share.
+
+SQLiteCache keeps namespaced JSON values in a single SQLite file opened in
+WAL mode, so any number of readers proceed while one writer commits. It has
+the same get/set/clear interface as cache.AnswerCache, with a TTL and a
+per-namespace size bound (oldest entries are evicted first).
+
+make_cache() picks the tier: set SHARED_CACHE_PATH to a file path to share
+entries between workers, otherwise each process gets an in-process
+AnswerCache. Pointing SHARED_CACHE_PATH at a temp file is enough to try the
+shared tier locally; no external service is involved.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from cache import AnswerCache
+
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    value     TEXT NOT NULL,
+    expires   REAL NOT NULL,
+    created   REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (namespace, created);
+"""
+
+
+class SQLiteCache:
+    def __init__(self, path: str, namespace: str, ttl_seconds: float = 4 * 3600,
+                 max_entries: int = 512, evict_every: int = 32):
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        row = self._conn().execute(
+            "SELECT value, expires FROM entries WHERE namespace=? AND key=?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires, created) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), now + self.ttl_seconds, now),
+        )
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones beyond max_entries."""
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE namespace=? AND expires<?", (self.namespace, time.time()))
+        conn.execute(
+            "DELETE FROM entries WHERE namespace=? AND key IN ("
+            " SELECT key FROM entries WHERE namespace=? ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries),
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries WHERE namespace=?", (self.namespace,))
+
+    def __len__(self):
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace=? AND expires>=?", (self.namespace, time.time())
+        ).fetchone()
+        return row[0]
+
+
+def make_cache(namespace: str, ttl_seconds: float = 4 * 3600, max_entries: int = 512):
+    """Shared SQLite cache when SHARED_CACHE_PATH is set, in-process AnswerCache otherwise."""
+    if SHARED_CACHE_PATH:
+        return SQLiteCache(SHARED_CACHE_PATH, namespace, ttl_seconds=ttl_seconds, max_entries=max_entries)
+    return AnswerCache(ttl_seconds=ttl_seconds, max_entries=max_entries)